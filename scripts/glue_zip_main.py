@@ -16,9 +16,10 @@ import sys
 # Job arguments that must be visible to the code as environment variables. Glue delivers
 # arguments on the command line (``sys.argv``), NOT as env vars, but the code reads these
 # from the environment (get_secrets() reads LOTERIA_SECRET_NAME at import time; PR-017,
-# and configure_logging() reads CORRELATION_ID; PR-018). So this bridge must run BEFORE
-# the transformer is imported below.
-_ARGS_TO_BRIDGE = ("LOTERIA_SECRET_NAME", "CORRELATION_ID")
+# configure_logging() reads CORRELATION_ID; PR-018, transform() sizes its process pool
+# from the optional TRANSFORM_WORKERS, and PROFILE=1 turns on the parse-step profiler).
+# So this bridge must run BEFORE the transformer is imported below.
+_ARGS_TO_BRIDGE = ("LOTERIA_SECRET_NAME", "CORRELATION_ID", "TRANSFORM_WORKERS", "PROFILE")
 
 
 def _bridge_args_to_env() -> None:
@@ -1,11 +1,45 @@
 import logging
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+# One connection pool is shared by every thread using the client, so it must cover the
+# widest fan-out: list_files_in_s3's 16 listing threads, plus the transformer's 4
+# concurrent PUTs per sorteo. botocore's default of 10 would make those threads wait on it.
+_S3_CLIENT_CONFIG = Config(max_pool_connections=20)
+
+# Threads list_files_in_s3 uses to paginate partitions side by side
+_LIST_MAX_WORKERS = 16
+
+_s3_clients = {}  # pid -> client
+_s3_clients_lock = threading.Lock()
+
+
+def _get_s3_client():
+    """
+    Return this process's shared S3 client, creating it on first use.
+
+    A boto3 client is thread-safe once built, but creating clients from the default session
+    is not, and a client must never cross a fork (the transformer's pool workers) — hence
+    one client per PID, built under a lock.
+    """
+    pid = os.getpid()
+    client = _s3_clients.get(pid)
+    if client is None:
+        with _s3_clients_lock:
+            client = _s3_clients.get(pid)
+            if client is None:
+                client = boto3.client("s3", config=_S3_CLIENT_CONFIG)
+                _s3_clients[pid] = client
+    return client
+
 
 def upload_to_s3(local_file_path, s3_bucket, s3_key):
     s3 = boto3.client("s3")
@@ -27,8 +61,7 @@ def check_if_sorteo_exists(s3_bucket, year, sorteo_number):
             raise e
 
 
-def list_files_in_s3(bucket_name, prefix):
-    s3 = boto3.client("s3")
+def _list_txt_keys(s3, bucket_name, prefix):
     paginator = s3.get_paginator("list_objects_v2")  # using official paginator from s3
     page_iterator = paginator.paginate(Bucket=bucket_name, Prefix=prefix)
     all_keys = []
@@ -43,19 +76,78 @@ def list_files_in_s3(bucket_name, prefix):
     return all_keys
 
 
+def list_files_in_s3(bucket_name, prefix):
+    """
+    Lists every .txt key under ``prefix``.
+
+    A single paginator is one round trip per 1000 keys, back to back. So the first level
+    below ``prefix`` (the raw layer's ``year=YYYY/`` partitions) is listed with a delimiter,
+    and each partition is then paginated in its own thread. Keys come back grouped by
+    partition, in listing order.
+    """
+    s3 = _get_s3_client()
+    paginator = s3.get_paginator("list_objects_v2")
+    page_iterator = paginator.paginate(Bucket=bucket_name, Prefix=prefix, Delimiter="/")
+    all_keys = []
+    sub_prefixes = []
+    for page in page_iterator:
+        # Objects sitting directly under the prefix (no partition folder)
+        all_keys.extend(
+            [
+                content["Key"]
+                for content in page.get("Contents", [])
+                if content["Key"].endswith(".txt")
+            ]
+        )
+        sub_prefixes.extend(cp["Prefix"] for cp in page.get("CommonPrefixes", []))
+
+    if sub_prefixes:
+        # One thread per partition, up to _LIST_MAX_WORKERS
+        max_workers = min(len(sub_prefixes), _LIST_MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            for keys in ex.map(lambda p: _list_txt_keys(s3, bucket_name, p), sub_prefixes):
+                all_keys.extend(keys)
+    return all_keys
+
+
 def list_processed_sorteos_in_partitioned_bucket(bucket_name, prefix="processed/sorteos/"):
+    """
+    Returns the set of sorteo numbers (int) found under ``prefix``, for O(1) membership
+    checks in the transformer's idempotency filter.
+
+    Understands both Silver layouts: ``sorteo=NNNN/`` (one sorteo per file) and the
+    transformer's ``batch=FIRST-LAST/`` (every sorteo number in FIRST..LAST — batches only
+    ever hold consecutive numbers).
+    """
+    sorteos_procesados, _ = scan_partitioned_prefix(bucket_name, prefix)
+    return sorteos_procesados
+
+
+def scan_partitioned_prefix(bucket_name, prefix):
+    """
+    Lists ``prefix`` once and returns ``(sorteo_numbers, partition_keys)``: the sorteo
+    numbers as in list_processed_sorteos_in_partitioned_bucket, plus the Hive partition key
+    names (e.g. {"year", "sorteo"}) that appear in the folder names below ``prefix``.
+    """
     s3 = boto3.client("s3")
     paginator = s3.get_paginator("list_objects_v2")
     operation_parameters = {"Bucket": bucket_name, "Prefix": prefix}
     page_iterator = paginator.paginate(**operation_parameters)
     sorteos_procesados = set()
+    partition_keys = set()
     for page in page_iterator:
         for obj in page.get("Contents", []):
             key = obj["Key"]
+            partition_keys.update(re.findall(r"([^/=]+)=[^/]*/", key[len(prefix) :]))
             match = re.search(r"sorteo=(\d+)", key)
             if match:
                 sorteos_procesados.add(int(match.group(1)))
-    return sorteos_procesados
+                continue
+            batch_match = re.search(r"batch=(\d+)-(\d+)", key)
+            if batch_match:
+                first, last = int(batch_match.group(1)), int(batch_match.group(2))
+                sorteos_procesados.update(range(first, last + 1))
+    return sorteos_procesados, partition_keys
 
 
 def download_file_from_s3(bucke_name, s3_key, local_path):
@@ -67,6 +159,19 @@ def download_file_from_s3(bucke_name, s3_key, local_path):
     logger.info("Downloaded file from S3", extra={"s3_key": s3_key, "local_path": local_path})
 
 
+def get_object_lines(bucket_name, s3_key):
+    """
+    Streams an S3 object as UTF-8 text lines (without line endings), so neither the whole
+    body nor a second copy split into lines is ever held in memory.
+    The caller must consume the iterator promptly: it reads from the live response body.
+    """
+    s3 = _get_s3_client()
+    body = s3.get_object(Bucket=bucket_name, Key=s3_key)["Body"]
+    logger.info("Streaming object from S3", extra={"s3_key": s3_key})
+    for line in body.iter_lines(chunk_size=65536):
+        yield line.decode("utf-8")
+
+
 def upload_file_to_s3(local_path, bucket_name, s3_key):
     """
     Uploads a file from the local filesystem to S3.
@@ -77,3 +182,16 @@ def upload_file_to_s3(local_path, bucket_name, s3_key):
         "Uploaded file to S3",
         extra={"local_path": local_path, "s3_uri": f"s3://{bucket_name}/{s3_key}"},
     )
+
+
+def put_bytes_to_s3(data, bucket_name, s3_key):
+    """
+    Uploads an in-memory payload (e.g. a Parquet buffer) to S3 with a single PUT.
+    Safe to call from several threads at once (shared per-process client).
+    """
+    s3 = _get_s3_client()
+    s3.put_object(Bucket=bucket_name, Key=s3_key, Body=data)
+    logger.info(
+        "Uploaded object to S3",
+        extra={"bytes": len(data), "s3_uri": f"s3://{bucket_name}/{s3_key}"},
+    )
@@ -3,17 +3,29 @@ import re
 
 logger = logging.getLogger(__name__)
 
+# Compiled once at import: process_body runs the premio pattern on every BODY line.
+_PREMIO_RE = re.compile(r"(\d+)\s+(\w+)\s+\.+\s+([\d,]+\.?\d*)")
+_NUMERO_SORTEO_RE = re.compile(r"NO. (\d+)")
+_TIPO_SORTEO_RE = re.compile(r"SORTEO (\w+)", re.IGNORECASE)
+_FECHA_SORTEO_RE = re.compile(r"FECHA DEL SORTEO: ([\d/]+)")
+_FECHA_CADUCIDAD_RE = re.compile(r"FECHA DE CADUCIDAD: ([\d/]+)")
+_PREMIOS_MAYORES_RE = re.compile(
+    r"PRIMER PREMIO (\d+) \|\|\| SEGUNDO PREMIO (\d+) \|\|\| TERCER PREMIO (\d+)"
+)
+_REINTEGROS_RE = re.compile(r"REINTEGROS ([\d, ]+)")
+
 
 def split_header_body(content_lines):
     """
     Splits the content of a file into HEADER and BODY sections.
     Args:
-        content_lines (list): List of lines in the file.
+        content_lines (iterable): Lines of the file — a list, or any iterator (e.g. lines
+            streamed from S3); it is consumed exactly once.
     Returns:
         tuple: HEADER and BODY sections as lists of strings.
     """
-    # Limpia las líneas antes de buscar
-    content_cleaned = [line.strip() for line in content_lines if line.strip()]
+    # Limpia las líneas antes de buscar (strip una sola vez por línea)
+    content_cleaned = [stripped for line in content_lines if (stripped := line.strip())]
 
     try:
         header_start = content_cleaned.index("HEADER")
@@ -36,20 +48,22 @@ def process_header(header):
     Args:
         header (list): List of lines in the HEADER section.
     Returns:
-        dict: Extracted data from the HEADER section.
+        dict: Extracted data from the HEADER section ("fecha_sorteo" is None when the
+            header has no readable FECHA DEL SORTEO).
     """
     # Regular expressions for extract specific information in header
     try:
-        numero_sorteo = re.search(r"NO. (\d+)", header[0]).group(1)
-        tipo_sorteo = re.search(r"SORTEO (\w+)", header[0], re.IGNORECASE).group(1)
-        fecha_sorteo = re.search(r"FECHA DEL SORTEO: ([\d/]+)", " ".join(header)).group(1)
-        fecha_caducidad = re.search(r"FECHA DE CADUCIDAD: ([\d/]+)", " ".join(header)).group(1)
-        premios = re.search(
-            r"PRIMER PREMIO (\d+) \|\|\| SEGUNDO PREMIO (\d+) \|\|\| TERCER PREMIO (\d+)",
-            " ".join(header),
-        )
+        header_text = " ".join(header)
+        numero_sorteo = _NUMERO_SORTEO_RE.search(header[0]).group(1)
+        tipo_sorteo = _TIPO_SORTEO_RE.search(header[0]).group(1)
+        # A missing/unreadable draw date is not a format error: the transformer skips
+        # sorteos without a usable fecha_sorteo, so report it as None instead of raising.
+        fecha_sorteo_match = _FECHA_SORTEO_RE.search(header_text)
+        fecha_sorteo = fecha_sorteo_match.group(1) if fecha_sorteo_match else None
+        fecha_caducidad = _FECHA_CADUCIDAD_RE.search(header_text).group(1)
+        premios = _PREMIOS_MAYORES_RE.search(header_text)
         primer_premio, segundo_premio, tercer_premio = premios.groups()
-        reintegros = re.search(r"REINTEGROS ([\d, ]+)", " ".join(header)).group(1).replace(" ", "")
+        reintegros = _REINTEGROS_RE.search(header_text).group(1).replace(" ", "")
     except AttributeError as e:
         logger.error("An error occurred while processing the HEADER")
         raise ValueError("The HEADER does not contain the expected format.") from e
@@ -77,16 +91,21 @@ def process_body(body):
     premios_data = []
     last_premio_index = None  # Índice del último premio procesado
 
+    # Checked once: the per-line debug calls below would otherwise build their `extra` dict
+    # for every line even with DEBUG off.
+    debug = logger.isEnabledFor(logging.DEBUG)
+
     logger.debug("Processing BODY section")
     for line in body:
         line = line.strip()
         if not line:
             continue
 
-        logger.debug("Processing line", extra={"line": line})
+        if debug:
+            logger.debug("Processing line", extra={"line": line})
 
         # Intentar coincidir con una línea de premio
-        match = re.match(r"(\d+)\s+(\w+)\s+\.+\s+([\d,]+\.?\d*)", line)
+        match = _PREMIO_RE.match(line)
         if match:
             numero_premiado, letras, monto = match.groups()
             monto = float(monto.replace(",", ""))  # Limpiar el monto
@@ -120,7 +139,8 @@ def process_body(body):
 
         else:
             # Ignorar las líneas que no coinciden (para depuración)
-            logger.debug("Ignored line", extra={"line": line})
+            if debug:
+                logger.debug("Ignored line", extra={"line": line})
 
     logger.info("Premios processed", extra={"premios_count": len(premios_data)})
     return premios_data
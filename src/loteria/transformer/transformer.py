@@ -7,7 +7,9 @@ Goal:
 - Enforce a *stable Silver schema* (types + partitions)
 - Write Parquet to:
   - Partitioned bucket (Silver): silver/{dataset}/year=YYYY/sorteo=NNNN/{dataset}.parquet
-  - Simple bucket (optional, flat files):
+    (or, with BATCH_SIZE > 1: silver/{dataset}/year=YYYY/batch=FIRST-LAST/{dataset}.parquet,
+    one row group per sorteo)
+  - Simple bucket (optional, flat files; opt-in via WRITE_SIMPLE_BUCKET=1 / --WRITE_SIMPLE 1):
     <SIMPLE_PREFIX>/sorteos_<NNNN>.parquet, premios_<NNNN>.parquet
 
 Important:
@@ -15,21 +17,32 @@ Important:
 - Partitions (year, sorteo) must be added BEFORE writing Parquet.
 """
 
+import contextlib
+import cProfile
+import functools
+import io
 import logging
+import multiprocessing
 import os
+import pstats
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from awsglue.utils import getResolvedOptions
 
 from loteria.common.aws_secrets import get_secrets
 from loteria.common.logging_setup import configure_logging
 from loteria.common.s3_utils import (
-    download_file_from_s3,
+    get_object_lines,
     list_files_in_s3,
-    list_processed_sorteos_in_partitioned_bucket,
-    upload_file_to_s3,
+    put_bytes_to_s3,
+    scan_partitioned_prefix,
 )
 from loteria.parser.parser import (
     process_body,
@@ -51,218 +64,549 @@ SILVER_PREFIX_DEFAULT = "silver/"  # The new Source of Truth for clean Parquet
 SILVER_SORTEOS_PREFIX = f"{SILVER_PREFIX_DEFAULT}sorteos/"
 SILVER_PREMIOS_PREFIX = f"{SILVER_PREFIX_DEFAULT}premios/"
 
-
-def _to_int64(series: pd.Series, default=None) -> pd.Series:
+HEADER_DATE_FORMAT = "%d/%m/%Y"
+
+# Raw keys look like raw/year=YYYY/sorteo=NNNN/<file>.txt
+_SORTEO_RE = re.compile(r"sorteo=(\d+)/")
+
+# Text columns use the pyarrow-backed StringDtype: nulls stay <NA> and the data is held as an
+# Arrow array (smaller than Python str objects). pandas backs it with Arrow large_string, so
+# _to_arrow_table casts those columns back to string on write: the stored Arrow schema must
+# match the Silver files written before this dtype, or readers can't concat old and new.
+SILVER_STRING_DTYPE = "string[pyarrow]"
+
+# Columns of the premio records produced by process_body (+ numero_sorteo, attached here)
+PREMIOS_RECORD_COLUMNS = [
+    "numero_sorteo",
+    "numero_premiado",
+    "letras",
+    "monto",
+    "vendido_por",
+    "ciudad",
+    "departamento",
+]
+
+# Silver schema of the premios dataset
+PREMIOS_SILVER_DTYPES = {
+    "numero_sorteo": "int64",
+    "numero_premiado": "Int64",  # nullable
+    "letras": SILVER_STRING_DTYPE,
+    "monto": "float64",
+    "vendedor": SILVER_STRING_DTYPE,
+    "ciudad": SILVER_STRING_DTYPE,
+    "departamento": SILVER_STRING_DTYPE,
+}
+
+# Silver schema of the sorteos dataset (column order = Parquet column order). Dates are ns
+# so the Parquet type stays timestamp[ns].
+SORTEOS_SILVER_DTYPES = {
+    "numero_sorteo": "int64",
+    "tipo_sorteo": SILVER_STRING_DTYPE,
+    "fecha_sorteo": "datetime64[ns]",
+    "fecha_caducidad": "datetime64[ns]",
+    "primer_premio": "Int64",
+    "segundo_premio": "Int64",
+    "tercer_premio": "Int64",
+    "reintegro_primer_premio": "Int64",
+    "reintegro_segundo_premio": "Int64",
+    "reintegro_tercer_premio": "Int64",
+}
+
+# Explicit pyarrow writer settings (pq.write_table / ParquetWriter) instead of pandas'
+# auto-detected engine/codec. Snappy is the cheap-to-encode codec. A per-sorteo file is a
+# single row group of a few hundred rows, so there is nothing to prune and its column
+# statistics are skipped; batch files override this (BATCH_PARQUET_WRITE_OPTIONS).
+PARQUET_WRITE_OPTIONS = {
+    "compression": "snappy",
+    "use_dictionary": True,
+    "write_statistics": False,
+}
+
+# A batch file holds one row group per sorteo, so min/max statistics on numero_sorteo let
+# readers skip every row group but the sorteo(s) they filter on.
+BATCH_PARQUET_WRITE_OPTIONS = {**PARQUET_WRITE_OPTIONS, "write_statistics": ["numero_sorteo"]}
+
+# Workers MUST be forked, not spawned: they rely on inheriting the module globals that main()
+# overrides at runtime (partitioned_bucket, simple_bucket, WRITE_SIMPLE). A spawned worker
+# (macOS, and Linux's default from Python 3.14) re-imports this module, calls get_secrets()
+# again and silently loses those overrides. Glue runs on Linux, where fork is available.
+_POOL_CONTEXT = multiprocessing.get_context("fork")
+
+# The flat simple-bucket copies only serve notebooks, and writing them doubles the PUTs per
+# sorteo, so they are opt-in. main() lets the --WRITE_SIMPLE job argument override this.
+WRITE_SIMPLE = os.environ.get("WRITE_SIMPLE_BUCKET", "0") == "1"
+
+
+def _profiling_enabled() -> bool:
+    return os.environ.get("PROFILE") == "1"
+
+
+@contextlib.contextmanager
+def _profiled(label: str, **context):
+    """
+    Run the block under cProfile when PROFILE=1 and log the top entries by cumulative
+    time. A no-op otherwise, so it can stay in the hot path.
     """
-    Convert a Series to nullable Int64 (supports NA).
-    If default is provided, NA will be replaced with that value and cast to int64.
+    if not _profiling_enabled():
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(15)
+        logger.info("Profile", extra={"label": label, "profile": out.getvalue(), **context})
+
+
+def _to_int_or_none(value):
     """
-    s = pd.to_numeric(series, errors="coerce").astype("Int64")
-    if default is not None:
-        s = s.fillna(default).astype("int64")
-    return s
+    int(value), or None when it is missing or not an integer (like to_numeric(errors="coerce")).
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
 
 
-def _to_float64(series: pd.Series, default=0.0) -> pd.Series:
+def _to_arrow_table(df: pd.DataFrame) -> pa.Table:
     """
-    Convert a Series to float64, replacing invalid values with a default.
+    Convert a Silver DataFrame to an Arrow table, with large_string columns (pyarrow-backed
+    StringDtype) cast to string so the stored schema matches the existing Silver files.
     """
-    return pd.to_numeric(series, errors="coerce").fillna(default).astype("float64")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema = pa.schema(
+        [
+            field.with_type(pa.string()) if pa.types.is_large_string(field.type) else field
+            for field in table.schema
+        ],
+        metadata=table.schema.metadata,
+    )
+    return table.cast(schema)
 
 
-def _to_string(series: pd.Series) -> pd.Series:
+def _to_parquet_bytes(df: pd.DataFrame) -> bytes:
     """
-    Use pandas StringDtype to keep nulls as <NA> instead of 'nan' strings.
+    Serialize a DataFrame to Parquet in memory (no /tmp write + re-read before upload).
     """
-    return series.astype("string")
+    buf = io.BytesIO()
+    pq.write_table(_to_arrow_table(df), buf, **PARQUET_WRITE_OPTIONS)
+    return buf.getvalue()
 
 
-def transform(
-    bucket_name: str,
-    raw_prefix: str,
-    simple_prefix: str,
-    silver_prefix: str = SILVER_PREFIX_DEFAULT,
-) -> None:
+def _to_parquet_row_groups(dfs: list) -> bytes:
     """
-    Transforms raw lottery .txt files stored in S3 and uploads clean Silver Parquet
-    files back to S3.
+    Serialize same-schema DataFrames into ONE in-memory Parquet file, one row group each.
     """
+    tables = [_to_arrow_table(df) for df in dfs]
+    buf = io.BytesIO()
+    with pq.ParquetWriter(buf, tables[0].schema, **BATCH_PARQUET_WRITE_OPTIONS) as writer:
+        for table in tables:
+            writer.write_table(table, row_group_size=max(table.num_rows, 1))
+    return buf.getvalue()
 
-    # ✅ Idempotency check must be against SILVER (not legacy/processed)
-    processed_sorteos = list_processed_sorteos_in_partitioned_bucket(
-        bucket_name,
-        prefix=f"{silver_prefix}sorteos/",
-    )
 
-    raw_files = list_files_in_s3(bucket_name, raw_prefix)
+def _parse_header_date(value) -> pd.Timestamp:
+    """
+    Parse a HEADER date (dd/mm/YYYY) into a Timestamp.
+    Missing or malformed values become NaT, like pd.to_datetime(errors="coerce").
+    """
+    if not value:
+        return pd.NaT
+    try:
+        return pd.Timestamp(datetime.strptime(value, HEADER_DATE_FORMAT))
+    except ValueError:
+        return pd.NaT
 
-    logger.info(
-        "Scanned raw + Silver layers",
-        extra={
-            "raw_files": len(raw_files),
-            "processed_sorteos": len(processed_sorteos),
-            "raw_prefix": raw_prefix,
-        },
-    )
 
+def _pending_raw_files(raw_files: list, processed_sorteos: set) -> list:
+    """
+    Pair each raw key with its sorteo number, dropping keys with an unexpected layout and
+    sorteos already in Silver — so the pool only ever sees work that needs doing.
+
+    Each sorteo is pending at most once: if its sorteo=NNNN/ folder holds several .txt
+    files, the first key in listing order is kept and the rest are logged and ignored
+    (otherwise batch mode would write that sorteo into two batch files).
+    """
+    pending = {}
     for raw_file in raw_files:
         # Expect: raw/year=YYYY/sorteo=NNNN/<file>.txt
-        match = re.search(r"sorteo=(\d+)/", raw_file)
+        match = _SORTEO_RE.search(raw_file)
         if not match:
             logger.warning("Skipping file with unexpected structure", extra={"raw_file": raw_file})
             continue
 
         numero_sorteo = int(match.group(1))
         if numero_sorteo in processed_sorteos:
-            logger.info("Skipping already processed sorteo", extra={"sorteo_number": numero_sorteo})
             continue
+        if numero_sorteo in pending:
+            logger.warning(
+                "Skipping duplicate raw file for sorteo",
+                extra={
+                    "sorteo_number": numero_sorteo,
+                    "raw_file": raw_file,
+                    "kept_raw_file": pending[numero_sorteo],
+                },
+            )
+            continue
+        pending[numero_sorteo] = raw_file
+    return [(raw_file, numero_sorteo) for numero_sorteo, raw_file in pending.items()]
 
-        local_path = f"/tmp/{os.path.basename(raw_file)}"
-        download_file_from_s3(bucket_name, raw_file, local_path)
-
-        with open(local_path, encoding="utf-8") as f:
-            file_content = f.read()
 
-        header_lines, body_lines = split_header_body(file_content.splitlines())
+def _build_silver_frames(raw_file: str, numero_sorteo: int, bucket_name: str) -> tuple:
+    """
+    Parse ONE raw .txt file into its Silver sorteos/premios DataFrames.
+    Returns (year, sorteos_df, premios_df), or None when the sorteo has to be skipped.
 
-        # Parse into python objects
+    Runs inside a multiprocessing worker. Workers are forked (_POOL_CONTEXT), so the
+    module-level bucket config (including main()'s runtime overrides) is inherited; the S3
+    helpers build their boto3 client on first use, i.e. inside the worker, never across
+    the fork.
+    """
+    # Stream the raw file's lines straight from S3 into the parser (no /tmp round trip).
+    # The generator reads S3 lazily, so when profiling, fetch the whole file first to keep
+    # the GET out of the parse profiles.
+    lines = get_object_lines(bucket_name, raw_file)
+    if _profiling_enabled():
+        lines = list(lines)
+
+    with _profiled("parse_header", sorteo_number=numero_sorteo):
+        header_lines, body_lines = split_header_body(lines)
         sorteos = [process_header(header_lines)]
+
+    # Convert dates (this is what enables ORDER BY, filters, and time features). There is
+    # exactly one sorteo per file, so parse the scalars instead of a 1-row Series.
+    fecha_sorteo = _parse_header_date(sorteos[0].get("fecha_sorteo"))
+    if pd.isna(fecha_sorteo):
+        # No date -> no year partition. Bail out before parsing the BODY (the per-line
+        # regex loop is the heaviest step) or doing any DataFrame work.
+        logger.warning(
+            "Skipping sorteo with missing/invalid fecha_sorteo",
+            extra={"sorteo_number": numero_sorteo, "raw_file": raw_file},
+        )
+        return None
+    sorteos[0]["fecha_sorteo"] = fecha_sorteo
+    sorteos[0]["fecha_caducidad"] = _parse_header_date(sorteos[0].get("fecha_caducidad"))
+
+    with _profiled("parse_body", sorteo_number=numero_sorteo):
         premios = process_body(body_lines)
 
-        # Attach numero_sorteo to each premio row
-        for premio in premios:
-            premio["numero_sorteo"] = sorteos[0]["numero_sorteo"]
-
-        # -----------------------
-        # DataFrames
-        # -----------------------
-        sorteos_df = pd.DataFrame(sorteos)
-        premios_df = pd.DataFrame(premios)
-
-        # Split vendido_por into vendor/city/department
-        premios_df = split_vendido_por_column(premios_df)
-
-        # Normalize "DE ESTA CAPITAL" -> department = GUATEMALA
-        # Use fillna("") to avoid errors when ciudad is null
-        mask_capital = premios_df["ciudad"].fillna("").str.upper().eq("DE ESTA CAPITAL")
-        premios_df.loc[mask_capital, "departamento"] = "GUATEMALA"
-
-        # Keep only the columns you want in Silver
-        premios_df = premios_df[
-            [
-                "numero_sorteo",
-                "numero_premiado",
-                "letras",
-                "monto",
-                "vendedor",
-                "ciudad",
-                "departamento",
-            ]
+    # -----------------------
+    # PREMIOS DataFrame
+    # -----------------------
+    premios_df = pd.DataFrame.from_records(premios, columns=PREMIOS_RECORD_COLUMNS)
+
+    # Attach numero_sorteo to every premio row (scalar broadcast, no per-dict loop)
+    premios_df["numero_sorteo"] = sorteos[0]["numero_sorteo"]
+
+    # Split vendido_por into vendor/city/department
+    premios_df = split_vendido_por_column(premios_df)
+
+    # Normalize "DE ESTA CAPITAL" -> department = GUATEMALA
+    # .str.upper() passes nulls through and eq() on a null is False/NA, so no fillna("")
+    # temporary is needed; np.where rebuilds the column in one pass.
+    ciudad_upper = premios_df["ciudad"].str.upper()
+    premios_df["departamento"] = np.where(
+        ciudad_upper.eq("DE ESTA CAPITAL").fillna(False),
+        "GUATEMALA",
+        premios_df["departamento"],
+    )
+
+    # Keep only the columns you want in Silver
+    premios_df = premios_df[
+        [
+            "numero_sorteo",
+            "numero_premiado",
+            "letras",
+            "monto",
+            "vendedor",
+            "ciudad",
+            "departamento",
         ]
+    ]
+
+    # -----------------------
+    # Enforce PREMIOS schema (Silver)
+    # -----------------------
+    # Only the text columns can carry the "N/A" / "" sentinels; the numeric ones are coerced
+    # by to_numeric below, so don't scan them here.
+    str_cols = ["letras", "vendedor", "ciudad", "departamento"]
+    premios_df[str_cols] = premios_df[str_cols].replace({"N/A": None, "n/a": None, "": None})
+
+    # One to_numeric pass over the numeric columns, defaults for the non-nullable ones, then
+    # a single astype for the whole frame.
+    num_cols = ["numero_sorteo", "numero_premiado", "monto"]
+    premios_df[num_cols] = premios_df[num_cols].apply(pd.to_numeric, errors="coerce")
+    premios_df = premios_df.fillna({"numero_sorteo": 0, "monto": 0.0})
+    premios_df = premios_df.astype(PREMIOS_SILVER_DTYPES)
+
+    # -----------------------
+    # SORTEOS (Silver): one row, built straight into its final dtypes
+    # -----------------------
+    sorteo = sorteos[0]
+
+    # Split reintegros into 3 columns (defensive: missing/short values are padded with None).
+    # One row per file, so split the header string in Python, not via str.split(expand=True).
+    reintegros_raw = sorteo.pop("reintegros", None) or ""
+    reintegro_parts = (reintegros_raw.split(",") + [None, None, None])[:3]
+    (
+        sorteo["reintegro_primer_premio"],
+        sorteo["reintegro_segundo_premio"],
+        sorteo["reintegro_tercer_premio"],
+    ) = (_to_int_or_none(part) for part in reintegro_parts)
+
+    sorteos_df = pd.DataFrame(
+        {
+            col: pd.array([sorteo.get(col)], dtype=dtype)
+            for col, dtype in SORTEOS_SILVER_DTYPES.items()
+        }
+    )
 
-        # -----------------------
-        # Enforce PREMIOS schema (Silver)
-        # -----------------------
-        premios_df.replace({"N/A": None, "n/a": None, "": None}, inplace=True)
+    year = fecha_sorteo.year
 
-        premios_df["numero_sorteo"] = _to_int64(premios_df["numero_sorteo"], default=0)  # int64
-        premios_df["numero_premiado"] = _to_int64(premios_df["numero_premiado"])  # nullable Int64
-        premios_df["monto"] = _to_float64(premios_df["monto"], default=0.0)
+    return year, sorteos_df, premios_df
 
-        premios_df["letras"] = _to_string(premios_df["letras"])
-        premios_df["vendedor"] = _to_string(premios_df["vendedor"])
-        premios_df["ciudad"] = _to_string(premios_df["ciudad"])
-        premios_df["departamento"] = _to_string(premios_df["departamento"])
 
-        # -----------------------
-        # Enforce SORTEOS schema (Silver)
-        # -----------------------
+def _build_silver_frames_or_error(raw_file: str, numero_sorteo: int, bucket_name: str) -> tuple:
+    """
+    Batch-mode worker: _build_silver_frames() that never raises.
+    Returns (numero_sorteo, frames, error) so ONE bad raw file does not abort the whole
+    pool.starmap() (and with it every other sorteo of a backfill).
+    """
+    try:
+        return numero_sorteo, _build_silver_frames(raw_file, numero_sorteo, bucket_name), None
+    except Exception as e:
+        logger.exception(
+            "Failed to parse sorteo",
+            extra={"sorteo_number": numero_sorteo, "raw_file": raw_file},
+        )
+        return numero_sorteo, None, repr(e)
 
-        # Split reintegros into 3 columns (defensive)
-        if "reintegros" in sorteos_df.columns:
-            reintegro_split = sorteos_df["reintegros"].astype("string").str.split(",", expand=True)
-            # If the split produces fewer than 3 columns, pad them
-            while reintegro_split.shape[1] < 3:
-                reintegro_split[reintegro_split.shape[1]] = None
 
-            sorteos_df["reintegro_primer_premio"] = reintegro_split[0]
-            sorteos_df["reintegro_segundo_premio"] = reintegro_split[1]
-            sorteos_df["reintegro_tercer_premio"] = reintegro_split[2]
+def _upload_all(uploads: list) -> None:
+    """
+    PUT (bytes, bucket, key) triples concurrently (independent, network-latency-bound).
+    """
+    with ThreadPoolExecutor(max_workers=len(uploads)) as ex:
+        # list() drains the iterator so an upload failure is re-raised here
+        list(ex.map(lambda args: put_bytes_to_s3(*args), uploads))
 
-            sorteos_df.drop(columns=["reintegros"], inplace=True, errors="ignore")
-        else:
-            sorteos_df["reintegro_primer_premio"] = None
-            sorteos_df["reintegro_segundo_premio"] = None
-            sorteos_df["reintegro_tercer_premio"] = None
-
-        # Convert reintegros to int
-        for col in [
-            "reintegro_primer_premio",
-            "reintegro_segundo_premio",
-            "reintegro_tercer_premio",
-        ]:
-            sorteos_df[col] = _to_int64(sorteos_df[col])
-
-        # Convert core numeric columns
-        sorteos_df["numero_sorteo"] = _to_int64(sorteos_df["numero_sorteo"], default=0)  # int64
-        sorteos_df["primer_premio"] = _to_int64(sorteos_df["primer_premio"])
-        sorteos_df["segundo_premio"] = _to_int64(sorteos_df["segundo_premio"])
-        sorteos_df["tercer_premio"] = _to_int64(sorteos_df["tercer_premio"])
-
-        # Convert dates (this is what enables ORDER BY, filters, and time features)
-        sorteos_df["fecha_sorteo"] = pd.to_datetime(
-            sorteos_df["fecha_sorteo"],
-            format="%d/%m/%Y",
-            errors="coerce",
-        )
-        sorteos_df["fecha_caducidad"] = pd.to_datetime(
-            sorteos_df["fecha_caducidad"],
-            format="%d/%m/%Y",
-            errors="coerce",
-        )
 
-        # Derive partition year safely
-        if sorteos_df["fecha_sorteo"].isna().all():
-            raise ValueError(
-                f"Invalid fecha_sorteo for sorteo={numero_sorteo}. Cannot derive year partition."
-            )
+def _process_one_raw_file(
+    raw_file: str,
+    numero_sorteo: int,
+    bucket_name: str,
+    simple_prefix: str,
+    silver_prefix: str,
+) -> None:
+    """
+    Transform ONE raw .txt file into its own sorteos/premios Silver Parquet files
+    (the per-sorteo layout, BATCH_SIZE=1). Runs inside a multiprocessing worker.
+    """
+    frames = _build_silver_frames(raw_file, numero_sorteo, bucket_name)
+    if frames is None:
+        return
+    year, sorteos_df, premios_df = frames
+
+    # -----------------------
+    # Serialize Parquet in memory (each buffer is reused for every destination)
+    # -----------------------
+    sorteos_bytes = _to_parquet_bytes(sorteos_df)
+    premios_bytes = _to_parquet_bytes(premios_df)
+
+    # -----------------------
+    # Keys: simple bucket (flat files) - optional but useful for notebooks
+    # -----------------------
+    sorteos_key_simple = f"{simple_prefix}sorteos_{numero_sorteo}.parquet"
+    premios_key_simple = f"{simple_prefix}premios_{numero_sorteo}.parquet"
+
+    # -----------------------
+    # Keys: partitioned bucket (Silver - canonical)
+    # -----------------------
+    partitioned_sorteos_key = (
+        f"{silver_prefix}sorteos/year={year}/sorteo={numero_sorteo}/sorteos.parquet"
+    )
+    partitioned_premios_key = (
+        f"{silver_prefix}premios/year={year}/sorteo={numero_sorteo}/premios.parquet"
+    )
 
-        year = int(sorteos_df["fecha_sorteo"].dt.year.iloc[0])
+    # -----------------------
+    # Upload concurrently
+    # -----------------------
+    uploads = [
+        (sorteos_bytes, partitioned_bucket, partitioned_sorteos_key),
+        (premios_bytes, partitioned_bucket, partitioned_premios_key),
+    ]
+    if WRITE_SIMPLE:
+        uploads += [
+            (sorteos_bytes, simple_bucket, sorteos_key_simple),
+            (premios_bytes, simple_bucket, premios_key_simple),
+        ]
+    _upload_all(uploads)
+
+    logger.info(
+        "Sorteo processed successfully into Silver",
+        extra={"sorteo_number": numero_sorteo, "year": year},
+    )
 
-        # -----------------------
-        # Write Parquet locally
-        # -----------------------
-        sorteos_local_path = f"/tmp/sorteos_{numero_sorteo}.parquet"
-        premios_local_path = f"/tmp/premios_{numero_sorteo}.parquet"
 
-        sorteos_df.to_parquet(sorteos_local_path, index=False)
-        premios_df.to_parquet(premios_local_path, index=False)
+def _split_batches(numbered_frames: list, batch_size: int) -> list:
+    """
+    Cut (numero_sorteo, sorteos_df, premios_df) tuples of ONE year into batches of at most
+    batch_size CONSECUTIVE sorteo numbers. A gap starts a new batch, so a batch key's
+    batch=<first>-<last> range names exactly the sorteos inside it (idempotency relies on it).
+    """
+    batches = []
+    for item in sorted(numbered_frames, key=lambda t: t[0]):
+        current = batches[-1] if batches else None
+        if current and len(current) < batch_size and item[0] == current[-1][0] + 1:
+            current.append(item)
+        else:
+            batches.append([item])
+    return batches
 
-        # -----------------------
-        # Upload to simple bucket (flat files) - optional but useful for notebooks
-        # -----------------------
-        sorteos_key_simple = f"{simple_prefix}sorteos_{numero_sorteo}.parquet"
-        premios_key_simple = f"{simple_prefix}premios_{numero_sorteo}.parquet"
 
-        upload_file_to_s3(sorteos_local_path, simple_bucket, sorteos_key_simple)
-        upload_file_to_s3(premios_local_path, simple_bucket, premios_key_simple)
+def _write_batch(year: int, batch: list, simple_prefix: str, silver_prefix: str) -> None:
+    """
+    Write one batch of consecutive sorteos as a single Parquet file per dataset, with one
+    row group per sorteo:
+      silver/{dataset}/year=YYYY/batch=<first>-<last>/{dataset}.parquet
+    """
+    first, last = batch[0][0], batch[-1][0]
+    sorteos_bytes = _to_parquet_row_groups([sorteos_df for _, sorteos_df, _ in batch])
+    premios_bytes = _to_parquet_row_groups([premios_df for _, _, premios_df in batch])
+
+    uploads = [
+        (
+            sorteos_bytes,
+            partitioned_bucket,
+            f"{silver_prefix}sorteos/year={year}/batch={first}-{last}/sorteos.parquet",
+        ),
+        (
+            premios_bytes,
+            partitioned_bucket,
+            f"{silver_prefix}premios/year={year}/batch={first}-{last}/premios.parquet",
+        ),
+    ]
+    if WRITE_SIMPLE:
+        uploads += [
+            (sorteos_bytes, simple_bucket, f"{simple_prefix}sorteos_batch_{first}-{last}.parquet"),
+            (premios_bytes, simple_bucket, f"{simple_prefix}premios_batch_{first}-{last}.parquet"),
+        ]
+    _upload_all(uploads)
 
-        # -----------------------
-        # Upload to partitioned bucket (Silver - canonical)
-        # -----------------------
-        partitioned_sorteos_key = (
-            f"{silver_prefix}sorteos/year={year}/sorteo={numero_sorteo}/sorteos.parquet"
-        )
-        partitioned_premios_key = (
-            f"{silver_prefix}premios/year={year}/sorteo={numero_sorteo}/premios.parquet"
+    logger.info(
+        "Sorteo batch processed successfully into Silver",
+        extra={"first_sorteo": first, "last_sorteo": last, "sorteos": len(batch), "year": year},
+    )
+
+
+def _check_silver_layout(
+    bucket_name: str, silver_prefix: str, partition_keys: set, batch_size: int
+) -> None:
+    """
+    Refuse to write one Silver layout into a prefix that already holds the other.
+
+    The silver crawlers index silver/sorteos/ and silver/premios/ as ONE table each, so
+    year=YYYY/sorteo=NNNN/ and year=YYYY/batch=F-L/ folders side by side would give the
+    catalog two conflicting partition schemes ("NEVER mix schemas in the same S3 prefix").
+    partition_keys come from the idempotency scan of silver/sorteos/; premios/ is always
+    written with the same keys, so it is not listed again.
+    """
+    wanted, conflicting = ("batch", "sorteo") if batch_size > 1 else ("sorteo", "batch")
+    if conflicting in partition_keys:
+        raise ValueError(
+            f"s3://{bucket_name}/{silver_prefix}sorteos/ already holds {conflicting}= "
+            f"partitions; refusing to write the {wanted}= layout (BATCH_SIZE={batch_size}) "
+            "into the same prefix."
         )
 
-        upload_file_to_s3(sorteos_local_path, partitioned_bucket, partitioned_sorteos_key)
-        upload_file_to_s3(premios_local_path, partitioned_bucket, partitioned_premios_key)
 
-        logger.info(
-            "Sorteo processed successfully into Silver",
-            extra={"sorteo_number": numero_sorteo, "year": year},
+def transform(
+    bucket_name: str,
+    raw_prefix: str,
+    simple_prefix: str,
+    silver_prefix: str = SILVER_PREFIX_DEFAULT,
+    batch_size: int = 1,
+) -> None:
+    """
+    Transforms raw lottery .txt files stored in S3 and uploads clean Silver Parquet
+    files back to S3.
+
+    batch_size=1 writes one file per sorteo (year=YYYY/sorteo=NNNN/). A larger value packs
+    up to that many consecutive sorteos of a year into one file (year=YYYY/batch=F-L/),
+    which is what a backfill of thousands of tiny files wants. The two layouts have
+    different partition keys, so a Silver prefix may hold only one of them: the run is
+    refused (ValueError) if the target prefix already holds the other layout.
+    """
+
+    # ✅ Idempotency check must be against SILVER (not legacy/processed). The same listing
+    # tells which Silver layout the prefix already holds.
+    processed_sorteos, partition_keys = scan_partitioned_prefix(
+        bucket_name,
+        prefix=f"{silver_prefix}sorteos/",
+    )
+    _check_silver_layout(bucket_name, silver_prefix, partition_keys, batch_size)
+
+    raw_files = list_files_in_s3(bucket_name, raw_prefix)
+    pending = _pending_raw_files(raw_files, processed_sorteos)
+
+    logger.info(
+        "Scanned raw + Silver layers",
+        extra={
+            "raw_files": len(raw_files),
+            "processed_sorteos": len(processed_sorteos),
+            "pending_sorteos": len(pending),
+            "raw_prefix": raw_prefix,
+        },
+    )
+
+    # Each sorteo is independent (own raw file, own Silver keys), so fan the files out over
+    # a process pool. The work is dominated by S3 round trips, so more workers than the
+    # 1-DPU job's vCPUs still helps. TRANSFORM_WORKERS (env var, or the --TRANSFORM_WORKERS
+    # job argument bridged by glue_zip_main.py) tunes it without a code change.
+    workers = int(os.environ.get("TRANSFORM_WORKERS", "4"))
+
+    if batch_size <= 1:
+        worker = functools.partial(
+            _process_one_raw_file,
+            bucket_name=bucket_name,
+            simple_prefix=simple_prefix,
+            silver_prefix=silver_prefix,
+        )
+        with _POOL_CONTEXT.Pool(processes=workers) as pool:
+            pool.starmap(worker, pending)
+        return
+
+    # Batch mode: workers only parse; the frames come back here so that batches can be cut
+    # from the full, sorted set of pending sorteos of each year.
+    worker = functools.partial(_build_silver_frames_or_error, bucket_name=bucket_name)
+    with _POOL_CONTEXT.Pool(processes=workers) as pool:
+        results = pool.starmap(worker, pending)
+
+    frames_by_year = {}
+    failed = {}
+    for numero_sorteo, frames, error in results:
+        if error is not None:
+            failed[numero_sorteo] = error
+            continue
+        if frames is None:
+            continue
+        year, sorteos_df, premios_df = frames
+        frames_by_year.setdefault(year, []).append((numero_sorteo, sorteos_df, premios_df))
+
+    # Failed sorteos leave a gap, so no batch range covers them and they stay pending for
+    # the next run.
+    for year, numbered_frames in sorted(frames_by_year.items()):
+        for batch in _split_batches(numbered_frames, batch_size):
+            _write_batch(year, batch, simple_prefix, silver_prefix)
+
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} sorteo(s) failed to parse and were left pending: {sorted(failed)}"
         )
 
 
@@ -274,6 +618,8 @@ def main() -> None:
       - PARTITIONED_BUCKET
       - RAW_PREFIX
       - PROCESSED_PREFIX (we will treat this as the *simple bucket prefix*)
+      - WRITE_SIMPLE (optional, "1"/"0"): also write the flat simple-bucket copies
+      - BATCH_SIZE (optional, default 1): sorteos per Silver Parquet file (see transform())
     """
     # Configure JSON logging here (not in transformer/__main__.py) because the REAL Glue
     # entry point is the zip-root __main__.py from scripts/glue_zip_main.py, which imports
@@ -282,18 +628,25 @@ def main() -> None:
     # already bridged from the --CORRELATION_ID job argument.
     configure_logging("transformer")
 
-    args = getResolvedOptions(
-        sys.argv,
-        [
-            "SIMPLE_BUCKET",
-            "PARTITIONED_BUCKET",
-            "RAW_PREFIX",
-            "PROCESSED_PREFIX",
-        ],
-    )
+    arg_names = [
+        "SIMPLE_BUCKET",
+        "PARTITIONED_BUCKET",
+        "RAW_PREFIX",
+        "PROCESSED_PREFIX",
+    ]
+    # getResolvedOptions fails on any listed name that is absent, so optional arguments are
+    # only requested when they were actually passed.
+    for name in ("WRITE_SIMPLE", "BATCH_SIZE"):
+        if any(a == f"--{name}" or a.startswith(f"--{name}=") for a in sys.argv):
+            arg_names.append(name)
+
+    args = getResolvedOptions(sys.argv, arg_names)
 
     # Allow runtime overrides
-    global partitioned_bucket, simple_bucket
+    global partitioned_bucket, simple_bucket, WRITE_SIMPLE
+
+    if "WRITE_SIMPLE" in args:
+        WRITE_SIMPLE = args["WRITE_SIMPLE"] == "1"
 
     if args.get("PARTITIONED_BUCKET"):
         partitioned_bucket = args["PARTITIONED_BUCKET"]
@@ -303,6 +656,7 @@ def main() -> None:
 
     raw_prefix = args["RAW_PREFIX"]
     simple_prefix = args["PROCESSED_PREFIX"]  # treat as simple prefix
+    batch_size = int(args.get("BATCH_SIZE", 1))
 
     logger.info(
         "Starting Glue Job",
@@ -311,6 +665,8 @@ def main() -> None:
             "raw_prefix": raw_prefix,
             "simple_prefix": simple_prefix,
             "silver_prefix": SILVER_PREFIX_DEFAULT,
+            "write_simple": WRITE_SIMPLE,
+            "batch_size": batch_size,
         },
     )
 
@@ -319,6 +675,7 @@ def main() -> None:
         raw_prefix=raw_prefix,
         simple_prefix=simple_prefix,
         silver_prefix=SILVER_PREFIX_DEFAULT,
+        batch_size=batch_size,
     )
 
     logger.info("Glue Job finished")